@@ -3,7 +3,11 @@ from typing import Tuple
 import numpy as np
 import torch
 import torch.nn as nn
-import torch.nn.functional as F
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit, prange = None, None
 
 
 def m2l(sr: float, m: float) -> float:
@@ -28,6 +32,39 @@ def l2m(sr: float, l: float) -> float:
     return 12 * np.log2(sr / (440 * l)) + 69
 
 
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _cmnd(diff: np.ndarray,
+              lceil: np.ndarray,
+              lfloor: np.ndarray,
+              weight: np.ndarray) -> np.ndarray:
+        """Fused cumulative mean-normalized difference and midi interpolation,
+        normalizes `diff` in-place.
+        Args:
+            diff: [np.float32; [B, T / strides, lmax - 1]],
+                difference function on the tau >= 1 axis.
+            lceil, lfloor: [np.long; [M]], interpolation indices, tau - 1 axis.
+            weight: [np.float32; [M]], linear interpolation weights.
+        Returns:
+            [np.float32; [B, T / strides, M]], yingram.
+        """
+        bsize, frames, taus = diff.shape
+        # [B x T / strides, lmax - 1]
+        flat = diff.reshape(bsize * frames, taus)
+        out = np.empty((bsize * frames, weight.shape[0]), dtype=np.float32)
+        for i in prange(bsize * frames):
+            # cumulative mean normalization, single pass, index j <=> tau=j+1
+            denom = 1e-7
+            for j in range(taus):
+                denom += flat[i, j]
+                flat[i, j] = flat[i, j] * (j + 1) / denom
+            # midi-scale linear interpolation
+            for m in range(weight.shape[0]):
+                floor = flat[i, lfloor[m]]
+                out[i, m] = (flat[i, lceil[m]] - floor) * weight[m] + floor
+        return out.reshape(bsize, frames, weight.shape[0])
+
+
 class Yingram(nn.Module):
     """Yingram, Midi-scale cumulative mean-normalized difference.
     """
@@ -52,6 +89,39 @@ class Yingram(nn.Module):
         self.sr = sr
         # midi range
         self.mmin, self.mmax = Yingram.midi_range(sr, lmin, lmax)
+        # [mmax - mmin + 1], target lags
+        lags = m2l(sr, np.arange(self.mmin, self.mmax + 1))
+        lceil, lfloor = np.ceil(lags), np.floor(lags)
+        # offset by one to index the unpadded cumulative difference directly;
+        # safe since lags are lower-bounded by lmin >= 1, so the tau=0 column
+        # (constant one) is never gathered
+        self.register_buffer(
+            'lceil', torch.from_numpy(lceil).long() - 1, persistent=False)
+        self.register_buffer(
+            'lfloor', torch.from_numpy(lfloor).long() - 1, persistent=False)
+        # [mmax - mmin + 1], linear interpolation weights,
+        # lceil - lfloor is either zero or one, guard the degenerate case
+        self.register_buffer(
+            'weight',
+            torch.from_numpy(
+                (lags - lfloor) / np.maximum(lceil - lfloor, 1.)).float(),
+            persistent=False)
+        # [lmax - 1], reversed tail indices on the unpadded cumulative sum,
+        # read the c[W - tau] term for tau >= 1 as a single gather
+        self.register_buffer(
+            'rev_idx',
+            torch.arange(windows - 3, windows - 2 - lmax, -1),
+            persistent=False)
+        # [lmax - 1], lag-size normalizer
+        self.register_buffer(
+            'lag_weights', torch.arange(1, lmax).float(), persistent=False)
+        # specialize on the fixed (windows, lmax, strides) when torch.compile
+        # is available (torch>=2.0), otherwise fall back to eager.
+        ## full-pipeline fusion is delegated to inductor instead of a
+        ## hand-written kernel; a direct-correlation kernel would also hit
+        ## the O(windows x lmax) blow-up noted at the autocorrelation below.
+        if hasattr(torch, 'compile'):
+            self._compute = torch.compile(self._compute, dynamic=False)
 
     @staticmethod
     def midi_range(sr: int, lmin: int, lmax: int) -> Tuple[int, int]:
@@ -74,6 +144,25 @@ class Yingram(nn.Module):
                 where M = l2m(`lmin`), m = l2m(`max`)
                       l2m(l) = 12 x log2(`sr` / (440 * l)) + 69
         """
+        # numba-fused CPU fallback, the elementwise chain is dominated by
+        # per-op dispatch overhead on eager CPU inference
+        if njit is not None and audio.device.type == 'cpu' \
+                and not audio.requires_grad:
+            return torch.from_numpy(_cmnd(
+                self._difference(audio).numpy(),
+                self.lceil.numpy(),
+                self.lfloor.numpy(),
+                self.weight.numpy()))
+        return self._compute(audio)
+
+    def _difference(self, audio: torch.Tensor) -> torch.Tensor:
+        """Compute the YIN difference function.
+        Args:
+            audio: [torch.float32; [B, T]], audio signal, [-1, 1]-ranged.
+        Returns:
+            [torch.float32; [B, T / `strides`, `lmax` - 1]],
+                difference function on the tau >= 1 axis.
+        """
         # d[tau]
         # = sum_{j=1}^{W-tau} (x[j] - x[j + tau])^2
         # = sum_{j=1}^{W-tau} (x[j] ** 2 - 2x[j]x[j + tau] + x[j + tau] ** 2)
@@ -83,35 +172,82 @@ class Yingram(nn.Module):
 
         # alias
         w, tau_max = self.windows, self.lmax
+        bsize, timesteps = audio.shape
+        # [B, T + windows], zero-padded tail
+        padded = audio.new_zeros(bsize, timesteps + w)
+        padded[:, :timesteps] = audio
+        # [B, T / strides + 1, windows], strided view, no copy
+        frames = padded.as_strided(
+            (bsize, timesteps // self.strides + 1, w),
+            (padded.stride(0), self.strides, 1))
+        # materialize the overlapped view once; it is read twice below
+        # (fft, squared cumulative sum) and each read would otherwise
+        # trigger its own hidden contiguous copy inside the kernels
+        frames = frames.contiguous()
+        ## a direct matmul autocorrelation over the first `lmax` lags is
+        ## O(windows x lmax) per frame; with lmax ~ windows (2047 vs 2048 in
+        ## the default config) it costs far more than the O(windows log windows)
+        ## fft pair, so keep the fft-based autocorrelation.
+        # [B x (T / strides), windows], flatten the batch and frame axes
+        # so cufft runs one large-batch plan instead of many small ones
+        flat = frames.reshape(-1, w)
+        if flat.is_cuda and torch.cuda.get_device_capability()[0] >= 8:
+            # halve the memory traffic of the fft pair on Ampere+,
+            # safe since the audio is [-1, 1]-ranged and near zero-mean;
+            # the difference math below stays in fp32
+            # [B x (T / strides), windows // 2 + 1]
+            fft = torch.fft.rfft(flat.half(), dim=-1)
+            # [B x (T / strides), lmax], only the first `lmax` lags are consumed
+            corr = torch.fft.irfft(
+                fft.abs().square(), n=w, dim=-1)[..., :tau_max].float()
+        else:
+            # [B x (T / strides), windows // 2 + 1]
+            fft = torch.fft.rfft(flat, dim=-1)
+            # [B x (T / strides), lmax]
+            corr = torch.fft.irfft(
+                fft.abs().square(), n=w, dim=-1)[..., :tau_max]
+        # [B, T / strides, lmax]
+        corr = corr.view(bsize, -1, tau_max)
+        ## splitting this into two lmax-long partial cumulative sums (head of
+        ## the window and reversed tail) only pays when lmax << windows; with
+        ## lmax ~ windows in the default config the two slices would cover
+        ## the window twice over, so keep the single full pass.
         # [B, T / strides, windows]
-        frames = F.pad(audio, [0, w]).unfold(-1, w, self.strides)
-        # [B, T / strides, windows // 2 + 1]
-        fft = torch.fft.rfft(frames, dim=-1)
-        # [B, T / strides, windows], symmetric
-        corr = torch.fft.irfft(fft.abs().square(), dim=-1)
-        # [B, T / strides, windows + 1]
-        cumsum = F.pad(frames.square().cumsum(dim=-1), [1, 0])
-        # [B, T / strides, lmax], difference function
-        diff = (
-            # c[W - tau]
-            torch.flip(cumsum[..., w - tau_max:w], dims=[-1])
-            # - 2 * a[tau]
-            - 2 * corr[..., :tau_max]
-            # + (c[W] - c[tau]])
-            + cumsum[..., w, None] - cumsum[..., :tau_max])
+        cumsum = frames.square().cumsum(dim=-1)
+        # [B, T / strides, lmax - 1], difference function on the tau >= 1 axis,
+        # accumulated in-place to avoid materializing the intermediates;
+        # the tau=0 column is constant and never read downstream, so the
+        # leading-zero pad of the cumulative sum is dropped entirely
+        # c[W] - c[tau]
+        diff = cumsum[..., w - 1, None] - cumsum[..., :tau_max - 1]
+        # - 2 * a[tau]
+        diff.sub_(corr[..., 1:], alpha=2)
+        # + c[W - tau]
+        diff.add_(cumsum.index_select(-1, self.rev_idx))
+        return diff
+
+    def _compute(self, audio: torch.Tensor) -> torch.Tensor:
+        """Yingram implementation, compiled when torch.compile is supported.
+        Args:
+            audio: [torch.float32; [B, T]], audio signal, [-1, 1]-ranged.
+        Returns:
+            [torch.float32; [B, T / `strides`, M - m + 1]], yingram.
+        """
+        # [B, T / strides, lmax - 1], tau >= 1
+        diff = self._difference(audio)
         # [B, T / strides, lmax - 1]
-        cumdiff = diff[..., 1:] / (diff[..., 1:].cumsum(dim=-1) + 1e-7)
+        denom = diff.cumsum(dim=-1)
+        denom.add_(1e-7)
+        # reuse the cumulative-sum buffer for the quotient
+        cumdiff = torch.div(diff, denom, out=denom)
         ## in NANSY, Eq(1), it does not normalize the cumulative sum with lag size
         ## , but in YIN, Eq(8), it normalize the sum with their lags
-        cumdiff = cumdiff * torch.arange(1, tau_max, device=cumdiff.device)
-        # [B, T / strides, lmax], cumulative mean normalized difference
-        cumdiff = F.pad(cumdiff, [1, 0], value=1.)
-        # [mmax - mmin + 1]
-        lags = m2l(
-            self.sr,
-            torch.arange(self.mmin, self.mmax + 1, device=cumdiff.device))
-        lceil, lfloor = lags.ceil().long(), lags.floor().long()
-        # [B, T / strides, mmax - mmin + 1], yingram
-        return (
-            (cumdiff[..., lceil] - cumdiff[..., lfloor]) * (lags - lfloor)
-            / (lceil - lfloor) + cumdiff[..., lfloor])
+        cumdiff.mul_(self.lag_weights)
+        # [B, T / strides, mmax - mmin + 1], yingram,
+        # the tau=0 prefix (constant one) is dropped since `lceil` and
+        # `lfloor` are pre-shifted onto the unpadded tau >= 1 axis
+        floor = cumdiff.index_select(-1, self.lfloor)
+        # fused interpolation, floor + (ceil - floor) x weight
+        return torch.addcmul(
+            floor, cumdiff.index_select(-1, self.lceil).sub_(floor),
+            self.weight)
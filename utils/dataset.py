@@ -1,6 +1,7 @@
 import argparse
 import os
-from copy import deepcopy
+from collections import defaultdict
+from copy import copy
 from typing import Any, Callable, List, Optional, Tuple, Union
 
 import numpy as np
@@ -20,19 +21,19 @@ class PairedDataset(SpeechSet):
             verbose: progressive bar verbose support, `tqdm` could be possible.
         """
         super().__init__(reader)
-        self.groups = {}
+        self.groups = defaultdict(list)
         iters = self.dataset
         # verbose support
         if verbose:
             iters = verbose(iters)
+        # alias, drop the attribute lookups from the loop
+        transcript, sep = self.reader.transcript, os.sep
         # group with sid
         for path in iters:
             # temp, hack of LibriTTS reader, for optimization
-            key = os.path.basename(path).replace('.wav', '')
-            sid, _ = self.reader.transcript[key]
-            if sid not in self.groups:
-                self.groups[sid] = []
-            self.groups[sid].append(path)
+            # , basename without the `.wav` extension
+            key = path.rpartition(sep)[2][:-4]
+            self.groups[transcript[key][0]].append(path)
         # set default pair
         self.random_pairing()
 
@@ -42,11 +43,26 @@ class PairedDataset(SpeechSet):
             seed: random seed.
         """
         rng = np.random.default_rng(seed)
+        if not self.groups:
+            self.pairs = []
+            return
+        # [S], group sizes
+        lens = np.array([len(paths) for paths in self.groups.values()])
+        # [S, Pmax], single batched draw instead of a permutation per speaker
+        ## rng.permuted(axis=1) could shuffle a padded index matrix in-place
+        ## without the sort, but it scatters the padding slots across each
+        ## row and would force a per-speaker compaction afterwards; masked
+        ## keys + argsort keeps the valid indices in the leading slots.
+        keys = rng.random((len(lens), lens.max()))
+        # push the padding slots past every valid index
+        keys[np.arange(lens.max()) >= lens[:, None]] = np.inf
+        # [S, Pmax], the first `lens[s]` slots hold a permutation of the group
+        perm = np.argsort(keys, axis=1)
         pairs = []
-        for sid, paths in self.groups.items():
-            indices = rng.permutation(len(paths))
+        for (sid, paths), num, indices in zip(self.groups.items(), lens, perm):
+            indices = indices[:num]
             # repeating once
-            if len(paths) % 2 == 1:
+            if num % 2 == 1:
                 indices = np.append(indices, indices[0])
             # pairing
             pairs.extend([
@@ -62,7 +78,10 @@ class PairedDataset(SpeechSet):
         Returns:
             residual datset.
         """
-        residual = deepcopy(self)
+        # shallow copy, the reader and the cached path lists are read-only
+        # and safe to share; both groups are rebound below and the pairs
+        # are rebuilt by random_pairing
+        residual = copy(self)
         groups = list(self.groups.items())
         # seperate the speaker groups
         residual.groups = dict(groups[size:])
@@ -93,6 +112,16 @@ class PairedDataset(SpeechSet):
             for sid, *paths in raw]
         return self.collate(bunches)
 
+    def __getitems__(self, indices: List[int]) -> List[Any]:
+        """Batched fetch support for `torch.utils.data.DataLoader`(torch>=2.0),
+        fetches the whole batch in one call so the worker round-trips once.
+        Args:
+            indices: list of the indices.
+        Returns:
+            list of the normalized inputs, as `__getitem__` with int index.
+        """
+        return [self[index] for index in indices]
+
     def __len__(self) -> int:
         """Return length of the dataset.
         Returns:
@@ -129,11 +158,12 @@ class PairedDataset(SpeechSet):
         # [B, 2]
         lengths = np.array([[len(s1), len(s2)] for _, s1, s2 in bunch])
         len1, len2 = lengths.max(axis=0)
-        # [B, T]
-        speech1 = np.stack([
-            np.pad(signal, [0, len1 - len(signal)]) for _, signal, _ in bunch])
-        speech2 = np.stack([
-            np.pad(signal, [0, len2 - len(signal)]) for _, _, signal in bunch])
+        # [B, T], preallocate instead of padding each datum and stacking
+        speech1 = np.zeros((len(bunch), len1), dtype=np.float32)
+        speech2 = np.zeros((len(bunch), len2), dtype=np.float32)
+        for i, (_, s1, s2) in enumerate(bunch):
+            speech1[i, :len(s1)] = s1
+            speech2[i, :len(s2)] = s2
         return sids, lengths, speech1, speech2
 
 